@@ -1,5 +1,9 @@
 import os
 import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import IO, Optional, Union
 import numpy as np
 import pandas as pd
 
@@ -7,44 +11,74 @@ import pandas as pd
 # Logistic Regression (NumPy only)
 # -----------------------
 
-def sigmoid(z: np.ndarray) -> np.ndarray:
-    """Numerically stable sigmoid function."""
-    z = np.clip(z, -500, 500)
-    return 1.0 / (1.0 + np.exp(-z))
-
-def add_bias(X: np.ndarray) -> np.ndarray:
-    """Add a bias column (1s) to the input features."""
-    return np.c_[np.ones((X.shape[0], 1)), X]
+def sigmoid(z: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Numerically stable sigmoid function, computed as 0.5 * (1 + tanh(z / 2))."""
+    out = np.multiply(z, 0.5, out=out)
+    np.tanh(out, out=out)
+    out += 1.0
+    out *= 0.5
+    return out
 
 def predict_logistic_regression(X: np.ndarray, w: np.ndarray) -> np.ndarray:
-    """Predict probabilities using logistic regression."""
-    return sigmoid(X @ w)
+    """Predict probabilities using logistic regression (w[0] is the bias)."""
+    return sigmoid(X @ w[1:] + w[0])
 
 def logistic_regression_train(
     X: np.ndarray,
     y: np.ndarray,
-    learning_rate: float = 0.05,
-    iterations: int = 3000,
+    iterations: int = 25,
     l2: float = 0.0,
+    tol: float = 1e-6,
 ) -> np.ndarray:
-    """Train logistic regression using gradient descent (with optional L2 regularization)."""
-    Xb = add_bias(X)
-    w = np.zeros(Xb.shape[1], dtype=float)
-    n = y.size
+    """Train logistic regression using Newton's method / IRLS (with optional L2 regularization).
+
+    Returns the weights with the bias first; no bias column is added to X. The passes over X run in
+    X's dtype (float32 halves the memory traffic); weights and the Newton solve stay in float64.
+    """
+    XT = np.ascontiguousarray(X.T)
+    n, n_features = X.shape
+    n_weights = n_features + 1
+    w = np.zeros(n_weights, dtype=float)
+    tol_squared = tol * tol
+
+    # L2 regularization (excluding bias)
+    regularization = np.full(n_weights, l2)
+    regularization[0] = 0.0
+    regularization_matrix = np.diag(regularization)
+
+    # Buffers reused across iterations
+    z = np.empty(n, dtype=X.dtype)
+    residual = np.empty(n, dtype=X.dtype)
+    weights = np.empty(n, dtype=X.dtype)
+    weighted_X = np.empty((n, n_features), dtype=X.dtype)
+    gradient = np.empty(n_weights)
+    hessian = np.empty((n_weights, n_weights))
 
     for _ in range(iterations):
-        y_pred = sigmoid(Xb @ w)
-        gradient = (Xb.T @ (y_pred - y)) / n
-
-        # Apply L2 regularization (excluding bias)
-        if l2 > 0:
-            regularization = np.r_[0.0, w[1:]]
-            gradient += l2 * regularization
-
-        w -= learning_rate * gradient
-
-        # Early stopping
-        if np.linalg.norm(gradient) < 1e-6:
+        np.dot(X, w[1:].astype(X.dtype), out=z)
+        z += X.dtype.type(w[0])
+        y_pred = sigmoid(z, out=z)
+        np.subtract(y_pred, y, out=residual)
+        gradient[0] = residual.sum()
+        gradient[1:] = XT @ residual
+        gradient /= n
+        gradient += regularization * w
+
+        # Hessian of the mean log-loss over [1, X]: [1, X]^T diag(p(1-p)) [1, X] / n
+        np.subtract(1.0, y_pred, out=weights)
+        weights *= y_pred
+        np.multiply(X, weights[:, None], out=weighted_X)
+        hessian[0, 0] = weights.sum()
+        hessian[0, 1:] = hessian[1:, 0] = weighted_X.sum(axis=0)
+        hessian[1:, 1:] = XT @ weighted_X
+        hessian /= n
+        hessian += regularization_matrix
+
+        step = np.linalg.lstsq(hessian, gradient, rcond=None)[0]
+        w -= step
+
+        # Early stopping (squared norm, no sqrt)
+        if step @ step < tol_squared:
             break
 
     return w
@@ -53,86 +87,120 @@ def logistic_regression_train(
 # Data Loading
 # -----------------------
 
-def load_txt_to_dataframe(filepath: str) -> pd.DataFrame:
-    """Load occupancy data from a TXT file (timestamp \\t 0/1)."""
-    df = pd.read_csv(filepath, sep='\t', header=None, names=['timestamp', 'occupied'])
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df['occupied'] = df['occupied'].astype(int)
-    df = df.sort_values('timestamp')
+FIVE_MINUTES = np.timedelta64(5, 'm')
+
+def load_txt_to_arrays(filepath_or_buffer: Union[str, IO]) -> tuple[np.datetime64, np.ndarray]:
+    """Load occupancy data from a TXT file or file-like object as (first timestamp, 5-minute occupancy grid).
+
+    Missing intervals are filled with 0.
+    """
+    df = pd.read_csv(
+        filepath_or_buffer, sep='\t', header=None, names=['timestamp', 'occupied'],
+        dtype={'occupied': np.int8}, parse_dates=['timestamp'],
+    )
+    timestamps = df['timestamp'].to_numpy(dtype='datetime64[ns]')
+    start = timestamps.min()
+
+    # Scatter each row into its slot; rows off the 5-minute grid are dropped (as asfreq did)
+    slot, remainder = np.divmod(timestamps - start, FIVE_MINUTES)
+    on_grid = remainder == np.timedelta64(0, 'ns')
+    occupied = np.zeros(slot.max() + 1, dtype=np.int8)
+    occupied[slot[on_grid]] = df['occupied'].to_numpy()[on_grid]
+    return start, occupied
+
+def load_txt_to_dataframe(filepath_or_buffer: Union[str, IO]) -> pd.DataFrame:
+    """Load occupancy data from a TXT file or file-like object (timestamp \\t 0/1)."""
+    start, occupied = load_txt_to_arrays(filepath_or_buffer)
+    timestamps = start + np.arange(occupied.size) * FIVE_MINUTES
+    return pd.DataFrame({'timestamp': timestamps, 'occupied': occupied})
+
+# -----------------------
+# Time Features
+# -----------------------
+
+MINUTES_PER_WEEK = 7 * 24 * 60
+
+def build_feature_table() -> np.ndarray:
+    """Build the time features for every minute of the week (row 0 = Monday 00:00).
+
+    Columns: hour_sin, hour_cos, minute_sin, minute_cos, dow_sin, dow_cos, is_weekend.
+    """
+    minute_of_week = np.arange(MINUTES_PER_WEEK)
+    hour = (minute_of_week // 60) % 24
+    minute = minute_of_week % 60
+    dayofweek = minute_of_week // (24 * 60)
 
-    # Ensure 5-minute frequency, fill missing intervals with 0
-    df.set_index('timestamp', inplace=True)
-    df = df.asfreq('5min').fillna(0).astype(int)
-    df.reset_index(inplace=True)
-    return df
+    hour_angle = 2 * np.pi * np.arange(24) / 24
+    minute_angle = 2 * np.pi * np.arange(60) / 60
+    dow_angle = 2 * np.pi * np.arange(7) / 7
+
+    table = np.empty((MINUTES_PER_WEEK, 7), dtype=np.float32)
+    table[:, 0] = np.sin(hour_angle)[hour]
+    table[:, 1] = np.cos(hour_angle)[hour]
+    table[:, 2] = np.sin(minute_angle)[minute]
+    table[:, 3] = np.cos(minute_angle)[minute]
+    table[:, 4] = np.sin(dow_angle)[dayofweek]
+    table[:, 5] = np.cos(dow_angle)[dayofweek]
+    table[:, 6] = dayofweek >= 5
+    return table
+
+FEATURE_TABLE = build_feature_table()
+
+def feature_table_index(timestamps: np.ndarray) -> np.ndarray:
+    """Map datetime64 timestamps to their row in FEATURE_TABLE."""
+    minutes = timestamps.astype('datetime64[m]').astype(np.int64)
+    # 1970-01-01 was a Thursday, three days after the table's Monday origin
+    return (minutes + 3 * 24 * 60) % MINUTES_PER_WEEK
 
 # -----------------------
-# Forecasting Function
+# Forecasting Functions
 # -----------------------
 
+FORECAST_PERIODS = 144  # 12h of 5-min intervals
+
+def fit_occupancy_model(start: np.datetime64, occupied: np.ndarray) -> np.ndarray:
+    """Train logistic regression on a 5-minute occupancy history beginning at `start`."""
+    # Time features (looked up per minute of the week)
+    train_index = (feature_table_index(start) + 5 * np.arange(occupied.size)) % MINUTES_PER_WEEK
+    X_train = np.take(FEATURE_TABLE, train_index, axis=0)
+    y_train = occupied
+
+    return logistic_regression_train(X_train, y_train, l2=0.01)
+
+def predict_next_12h(model: np.ndarray, last_timestamp: np.datetime64, threshold: float = 0.6) -> list[dict]:
+    """Predict occupancy for the 12 hours (5-min resolution) after `last_timestamp`."""
+    # Future 12h timestamps and features
+    future_timestamps = last_timestamp + np.arange(1, FORECAST_PERIODS + 1) * FIVE_MINUTES
+    X_future = np.take(FEATURE_TABLE, feature_table_index(future_timestamps), axis=0)
+
+    y_prob = predict_logistic_regression(X_future, model)
+    y_pred = (y_prob >= threshold).astype(np.int8)
+
+    # Format all timestamps at once ("YYYY-MM-DDTHH:MM:SS" -> "YYYY-MM-DD HH:MM:SS")
+    timestamp_strings = np.char.replace(
+        np.datetime_as_string(future_timestamps.astype('datetime64[s]'), unit='s'), 'T', ' '
+    )
+    return [
+        {"timestamp": ts, "value": val}
+        for ts, val in zip(timestamp_strings.tolist(), y_pred.tolist())
+    ]
+
 def forecast_12h_from_txt(filepath_txt: str, output_folder: str):
     """Train logistic regression and predict the next 12 hours (5-min resolution)."""
     os.makedirs(output_folder, exist_ok=True)
     base_name = os.path.splitext(os.path.basename(filepath_txt))[0]
     output_filename = f"{base_name}_pred.json"
 
-    # Load and process data
-    df = load_txt_to_dataframe(filepath_txt)
-
-    # Time features
-    df['hour'] = df['timestamp'].dt.hour
-    df['minute'] = df['timestamp'].dt.minute
-    df['dayofweek'] = df['timestamp'].dt.dayofweek
-    df['is_weekend'] = (df['dayofweek'] >= 5).astype(int)
-    df['hour_sin'] = np.sin(2 * np.pi * df['hour'] / 24)
-    df['hour_cos'] = np.cos(2 * np.pi * df['hour'] / 24)
-    df['minute_sin'] = np.sin(2 * np.pi * df['minute'] / 60)
-    df['minute_cos'] = np.cos(2 * np.pi * df['minute'] / 60)
-    df['dow_sin'] = np.sin(2 * np.pi * df['dayofweek'] / 7)
-    df['dow_cos'] = np.cos(2 * np.pi * df['dayofweek'] / 7)
-
-    features = [
-        'hour_sin', 'hour_cos',
-        'minute_sin', 'minute_cos',
-        'dow_sin', 'dow_cos',
-        'is_weekend'
-    ]
-
-    X_train = df[features].to_numpy(dtype=float)
-    y_train = df['occupied'].to_numpy(dtype=int)
-
-    # Future 12h timestamps (144 intervals of 5min)
-    last_timestamp = df['timestamp'].max()
-    future_timestamps = pd.date_range(start=last_timestamp + pd.Timedelta(minutes=5), periods=144, freq='5min')
-    df_future = pd.DataFrame({'timestamp': future_timestamps})
-
-    # Future features
-    df_future['hour'] = df_future['timestamp'].dt.hour
-    df_future['minute'] = df_future['timestamp'].dt.minute
-    df_future['dayofweek'] = df_future['timestamp'].dt.dayofweek
-    df_future['is_weekend'] = (df_future['dayofweek'] >= 5).astype(int)
-    df_future['hour_sin'] = np.sin(2 * np.pi * df_future['hour'] / 24)
-    df_future['hour_cos'] = np.cos(2 * np.pi * df_future['hour'] / 24)
-    df_future['minute_sin'] = np.sin(2 * np.pi * df_future['minute'] / 60)
-    df_future['minute_cos'] = np.cos(2 * np.pi * df_future['minute'] / 60)
-    df_future['dow_sin'] = np.sin(2 * np.pi * df_future['dayofweek'] / 7)
-    df_future['dow_cos'] = np.cos(2 * np.pi * df_future['dayofweek'] / 7)
-
-    X_future = df_future[features].to_numpy(dtype=float)
-
-    # Train and predict
-    model = logistic_regression_train(X_train, y_train, learning_rate=0.05, iterations=3000, l2=0.01)
-    y_prob = predict_logistic_regression(add_bias(X_future), model)
-    y_pred = (y_prob >= 0.6).astype(int)
-
-    predictions = [
-        {"timestamp": ts.strftime("%Y-%m-%d %H:%M:%S"), "value": int(val)}
-        for ts, val in zip(df_future['timestamp'], y_pred)
-    ]
+    # Load data, train and predict
+    start, occupied = load_txt_to_arrays(filepath_txt)
+    model = fit_occupancy_model(start, occupied)
+    last_timestamp = start + (occupied.size - 1) * FIVE_MINUTES
+    predictions = predict_next_12h(model, last_timestamp)
 
     output_path = os.path.join(output_folder, output_filename)
+    # Encode once and write in a single call (json.dump writes chunk by chunk)
     with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(predictions, f, indent=2, ensure_ascii=False)
+        f.write(json.dumps(predictions, indent=2, ensure_ascii=False))
 
     print(f"[OK] Saved forecast to: {output_path}")
 
@@ -151,7 +219,14 @@ if __name__ == "__main__":
         print("  $env:OUTPUT_FOLDER='C:/path/to/output_folder'")
         exit(1)
 
-    for filename in os.listdir(input_folder):
-        if filename.endswith(".txt"):
-            full_path = os.path.join(input_folder, filename)
-            forecast_12h_from_txt(full_path, output_folder)
+    txt_paths = [
+        os.path.join(input_folder, filename)
+        for filename in os.listdir(input_folder)
+        if filename.endswith(".txt")
+    ]
+
+    # Files are independent: forecast them in parallel, with single-threaded BLAS per worker
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(var, "1")
+    with ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) as executor:
+        list(executor.map(forecast_12h_from_txt, txt_paths, repeat(output_folder)))
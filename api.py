@@ -3,7 +3,9 @@ from pydantic import BaseModel
 import numpy as np
 import pandas as pd
 import io
-from PlugPredict import load_txt_to_dataframe, forecast_12h_from_txt
+import hashlib
+from collections import OrderedDict
+from PlugPredict import FIVE_MINUTES, load_txt_to_arrays, fit_occupancy_model, predict_next_12h
 
 app = FastAPI(
     title="PlugPredict API",
@@ -11,6 +13,26 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Trained models keyed by SHA-1 of the uploaded history: (weights, last timestamp)
+MODEL_CACHE_SIZE = 32
+model_cache: "OrderedDict[str, tuple[np.ndarray, np.datetime64]]" = OrderedDict()
+
+def get_model(content: bytes) -> tuple[np.ndarray, np.datetime64]:
+    """Return the trained model for an uploaded history, training it only on a cache miss."""
+    key = hashlib.sha1(content).hexdigest()
+    if key in model_cache:
+        model_cache.move_to_end(key)
+        return model_cache[key]
+
+    start, occupied = load_txt_to_arrays(io.BytesIO(content))
+    model = fit_occupancy_model(start, occupied)
+    last_timestamp = start + (occupied.size - 1) * FIVE_MINUTES
+
+    model_cache[key] = (model, last_timestamp)
+    if len(model_cache) > MODEL_CACHE_SIZE:
+        model_cache.popitem(last=False)
+    return model, last_timestamp
+
 # Response model
 class ForecastItem(BaseModel):
     timestamp: str
@@ -30,23 +52,8 @@ async def compute_forecast(
     file: UploadFile = File(..., description="History file [.txt]"),
     threshold: float = Query(0.6, description="Decision threshold for occupancy (default=0.6)")
 ):
-    # Save uploaded file temporarily
-    temp_path = "temp_input.txt"
-    with open(temp_path, "wb") as f:
-        f.write(await file.read())
-
-    # Run pipeline
-    output_folder = "temp_out"
-    import os, json
-    os.makedirs(output_folder, exist_ok=True)
-    forecast_12h_from_txt(temp_path, output_folder)
-
-    # Build correct file path (matches PlugPredict naming)
-    base_name = os.path.splitext(os.path.basename(temp_path))[0]
-    output_file = os.path.join(output_folder, f"{base_name}_pred.json")
-
-    # Read JSON and return
-    with open(output_file, "r", encoding="utf-8") as f:
-        predictions = json.load(f)
+    # Reuse the trained model when the same history is uploaded again
+    model, last_timestamp = get_model(await file.read())
+    predictions = predict_next_12h(model, last_timestamp, threshold)
 
     return [ForecastItem(**p) for p in predictions]